@@ -31,20 +31,33 @@
 # POSSIBILITY OF SUCH DAMAGE.
 
 import argparse
-import datetime
-import dateutil.parser
+import functools
+import itertools
 import json
 import logging
 import re
 import sys
 
-from dateutil.relativedelta import relativedelta
+import numpy as np
 
-import netCDF4
+try:
+    # orjson parses large config files several times faster than json.
+    import orjson
+except ImportError:
+    orjson = None
 
-import numpy as np
+ALLOWED_PERIODS = frozenset(('years', 'month'))
+
+# numpy time units for the fixed length periods used in interval checks.
+PERIOD_UNITS = {'days': 'D', 'hours': 'h'}
 
-ALLOWED_PERIODS = ('years', 'month')
+# Approximate size of the blocks read when working through a variable
+# piece by piece.
+CHUNK_READ_SIZE = 16 * 1024 * 1024
+
+# Size above which variables are checked piece by piece rather than being
+# read into memory in one go, where the check allows it.
+LARGE_VARIABLE_SIZE = 64 * 1024 * 1024
 
 
 class LevelFilter(logging.Filter):
@@ -103,9 +116,16 @@ def load_constraints(config_file_path):
     """
     Handle loading in of config file.
     """
-    with open(config_file_path) as config_file:
-        config_str = config_file.read()
-    constraints = json.loads(config_str)
+    with open(config_file_path, 'rb') as config_file:
+        config_bytes = config_file.read()
+    if orjson is not None:
+        try:
+            return orjson.loads(config_bytes)
+        except orjson.JSONDecodeError:
+            # orjson rejects the NaN and Infinity literals which json
+            # accepts, so leave json to load or reject the config.
+            pass
+    constraints = json.loads(config_bytes)
     return constraints
 
 
@@ -113,16 +133,28 @@ def load_input(input_file_path):
     """
     Handle loading in of file to validate.
     """
+    # netCDF4 is slow to import, so only do so when a file is to be read.
+    import netCDF4
+
     nc_file = netCDF4.Dataset(input_file_path, 'r')
     return nc_file
 
 
+@functools.lru_cache(maxsize=None)
+def _compile_pattern(pattern):
+    """
+    Compile a regular expression once and reuse it for every subsequent
+    check against the same pattern.
+    """
+    return re.compile(pattern)
+
+
 def match_pattern(pattern, value):
     """
-    Helper function to carry out pattern matching
+    Helper function to carry out pattern matching. The pattern may be a
+    string or an already compiled regular expression.
     """
-    patt = re.compile(pattern)
-    match = patt.match(value)
+    match = _compile_pattern(pattern).match(value)
     return match is not None
 
 
@@ -140,61 +172,82 @@ def check_globals(product, constraints, skip=["short_name"], strict=False,
     if not isinstance(logger, logging.Logger):
         logger = initialise_logger(verbosity=logging.CRITICAL)
 
+    # Read all the global attributes once rather than going back to the
+    # file for every check.
+    global_attrs = {key: product.getncattr(key) for key in product.ncattrs()}
+
     for key in constraints['required_global_attributes']:
         if key not in skip:
             # Check if a known required_global_attribute is present in a
             # product and determine if there are any constraints on it.
             # N.B. Constraints on globals are top-level entries in the config
             # file, hence the check for both.
-            if key in product.ncattrs() and key in constraints:
+            present = key in global_attrs
+            constrained = key in constraints
+            if present and constrained:
                 # Checks for when a global is present and has some constraints
                 # specified.
                 if isinstance(constraints[key], list):
                     # Checking against a list of specified values
-                    if product.getncattr(key) in constraints[key]:
-                        logger.info("OK - Global %s" % key)
+                    if global_attrs[key] in constraints[key]:
+                        logger.info("OK - Global %s", key)
                     else:
-                        logger.error("Global %s not in allowed values" % key)
+                        logger.error("Global %s not in allowed values", key)
                         errcount += 1
                 elif isinstance(constraints[key], dict):
                     # Checking against entries in a dict
                     for conkey in constraints[key]:
                         if conkey == "pattern":
                             if match_pattern(constraints[key]['pattern'],
-                                             product.getncattr(key)):
-                                logger.info("OK - %s matches pattern" % key)
+                                             global_attrs[key]):
+                                logger.info("OK - %s matches pattern", key)
                             else:
                                 logger.error(
-                                    "%s does not match required pattern" %
+                                    "%s does not match required pattern",
                                     key)
                                 errcount += 1
                         else:
                             logger.error(
-                                "Check for %s, %s not implemented" %
-                                (key, conkey))
+                                "Check for %s, %s not implemented",
+                                key, conkey)
                             errcount += 1
                 else:
-                    logger.warn("Constraint on %s is not defined" % key)
+                    logger.warn("Constraint on %s is not defined", key)
                     warncount += 1
             # Checks for when a required_global_attribute is present but there
             # are no constraints specified
-            elif key in product.ncattrs() and key not in constraints:
-                logger.info("OK - Global %s" % key)
+            elif present:
+                logger.info("OK - Global %s", key)
             # If a required global is not present in the file then an error
             # needs recording
-            elif key not in product.ncattrs():
-                logger.error("required global %s not defined" % key)
+            else:
+                logger.error("required global %s not defined", key)
                 errcount += 1
 
     if strict:
-        for key in product.ncattrs():
-            if key not in constraints['required_global_attributes']:
+        required = frozenset(constraints['required_global_attributes'])
+        for key in global_attrs:
+            if key not in required:
                 errcount += 1
-                logger.error('Unrequested global variable %s present' % key)
+                logger.error('Unrequested global variable %s present', key)
 
     return errcount, warncount
 
 
+@functools.lru_cache(maxsize=None)
+def _parse_reference_time(forecast_ref_time):
+    """
+    Parse a forecast reference time once and reuse it for every interval
+    check against the same file. Any timezone is dropped so that the
+    datetimes stay in the local time of the reference time.
+    """
+    # dateutil is only needed for interval checks, so import it here.
+    import dateutil.parser
+
+    ref_time = dateutil.parser.parse(forecast_ref_time).replace(tzinfo=None)
+    return np.datetime64(ref_time, 's')
+
+
 def get_period_stepsize(leadtimes, forecast_ref_time, period):
     """
     Get the stepsize over the specified period.
@@ -202,32 +255,31 @@ def get_period_stepsize(leadtimes, forecast_ref_time, period):
     """
     # Leadtimes given in the file are expressed in hours since the
     # forecast reference time (i.e. forecast start date), so we need
-    # to convert these into datetime objects before we can extract the
+    # to convert these into datetimes before we can extract the
     # required period for which we need to check the interval.
-    ref_time = dateutil.parser.parse(forecast_ref_time)
+    ref_time = _parse_reference_time(forecast_ref_time)
 
-    datetimes = [
-        ref_time + datetime.timedelta(hours=leadtime)
-        for leadtime in leadtimes
-    ]
+    leadtime_secs = np.rint(np.asarray(leadtimes, dtype=np.float64) * 3600)
+    datetimes = (ref_time +
+                 leadtime_secs.astype(np.int64).astype('timedelta64[s]'))
 
     # Determine the time interval over the specified time
-    # period (e.g. hours, days). For months, since it is not
-    # a standard unit of time, we just check that the month
-    # number increments by one. Month intervals also need to
+    # period (e.g. hours, days). For months and years, since they
+    # are not a standard unit of time, we just check that the month
+    # or year number increments by one. Month intervals also need to
     # be converted into modulo 12 to handle year changes.
     if period == 'month':
-        periods = np.array([
-            getattr(datetime, period) for datetime in datetimes
-        ])
-
-        stepsizes = periods[1:len(periods)] - periods[0:len(periods)-1]
+        periods = datetimes.astype('datetime64[M]').astype(np.int64)
+        stepsizes = np.diff(periods)
         stepsizes %= 12
+    elif period == 'years':
+        periods = datetimes.astype('datetime64[Y]').astype(np.int64)
+        stepsizes = np.diff(periods)
+    elif period in PERIOD_UNITS:
+        stepsizes = (np.diff(datetimes) //
+                     np.timedelta64(1, PERIOD_UNITS[period]))
     else:
-        stepsizes = np.array([
-            getattr(relativedelta(datetimes[i+1], datetimes[i]), period)
-            for i in range(len(datetimes)-1)
-            ])
+        raise ValueError('Unknown period %s' % period)
 
     return stepsizes
 
@@ -241,11 +293,410 @@ def check_stepsize(data, stepsize, forecast_ref_time=None, period=None):
 
     """
     if period is None:
-        steparr = data[1:len(data)] - data[0:len(data)-1]
+        steparr = np.diff(data, axis=0)
     else:
         steparr = get_period_stepsize(data, forecast_ref_time, period)
 
-    return np.all(steparr == stepsize)
+    # Every step matches when the smallest and largest steps both do,
+    # which avoids building a boolean array the size of the data.
+    if steparr.size == 0:
+        return True
+    stepmin, stepmax = get_extrema(steparr)
+    return bool(stepmin == stepsize and stepmax == stepsize)
+
+
+def check_values(data, values):
+    """
+    Helper routine to check that some given data holds the expected
+    values. A single value is compared against every data point, otherwise
+    data with a shape that the values can't be compared against fails
+    straight away rather than attempting the comparison.
+
+    """
+    expected = np.asarray(values)
+    try:
+        np.broadcast_shapes(np.shape(data), expected.shape)
+    except ValueError:
+        return False
+
+    return bool(np.all(data == expected))
+
+
+def iter_chunks(var):
+    """
+    Yield slices which cover a netCDF variable in blocks of roughly
+    CHUNK_READ_SIZE bytes, so that the variable can be worked through
+    without reading it all into memory at once, nor reading it with one
+    library call per storage chunk. Each block is made up of whole
+    storage chunks, spanning the last dimensions in full where they fit
+    and grouping as many chunks as fit along the next dimension in.
+    Contiguous variables are treated as chunked one point at a time.
+
+    """
+    shape = var.shape
+    if not shape:
+        yield ()
+        return
+
+    chunks = var.chunking()
+    if chunks is None or chunks == 'contiguous':
+        chunks = [1] * len(shape)
+    else:
+        chunks = list(chunks)
+
+    # Grow the block from the last dimension inwards, stopping at the
+    # first dimension which can't be covered in full.
+    block = list(chunks)
+    for dim in reversed(range(len(shape))):
+        block[dim] = 1
+        other_size = var.dtype.itemsize * int(np.prod(block))
+        fit = CHUNK_READ_SIZE // other_size // chunks[dim] * chunks[dim]
+        block[dim] = max(1, min(shape[dim], max(chunks[dim], fit)))
+        if block[dim] < shape[dim]:
+            break
+    chunks = block
+
+    starts = [range(0, size, chunk) for size, chunk in zip(shape, chunks)]
+    for corner in itertools.product(*starts):
+        yield tuple(slice(start, start + chunk)
+                    for start, chunk in zip(corner, chunks))
+
+
+def get_extrema(data, ignore_nan=False):
+    """
+    Get the minimum and maximum values of some data, ignoring any masked
+    points. This avoids building full size boolean arrays when checking
+    the data against a range. If ignore_nan is set, NaNs are ignored as
+    well, otherwise a NaN in the data gives NaN extrema.
+
+    """
+    if ignore_nan and data.dtype.kind in 'fc':
+        # A view with its own mask, combining any existing mask with the
+        # NaNs, so that the caller's data is left as it is.
+        data = np.ma.masked_array(data, mask=np.isnan(data))
+    return data.min(), data.max()
+
+
+class VariableContext:
+    """
+    Hold the state shared by the checks carried out on a single variable.
+    The variable's metadata is read once up front, while its data (and
+    the extrema of that data) are only read on first use and then reused
+    by any remaining checks. Where possible, the checks on large variables
+    read them a chunk at a time instead.
+
+    """
+    def __init__(self, product, variable, var_names, global_attrs,
+                 interval_data, logger):
+        self.product = product
+        self.name = variable
+        self.var_names = var_names
+        self.var = product[variable]
+        self.attrs = {key: self.var.getncattr(key)
+                      for key in self.var.ncattrs()}
+        self.dimensions = self.var.dimensions
+        self.global_attrs = global_attrs
+        self.interval_data = interval_data
+        self.logger = logger
+        self._data = None
+        self._extrema = {}
+
+    @property
+    def data(self):
+        if self._data is None:
+            self._data = self.var[:]
+        return self._data
+
+    @property
+    def is_large(self):
+        # Variables too large to comfortably hold in memory are worked
+        # through a chunk at a time where a check allows it.
+        if not isinstance(self.var.dtype, np.dtype):
+            return False
+        return self.var.size * self.var.dtype.itemsize > LARGE_VARIABLE_SIZE
+
+    def get_extrema(self, ignore_nan=False):
+        # Each kind of min/max reduction is only carried out once however
+        # many checks use it.
+        if ignore_nan not in self._extrema:
+            if self._data is None and self.is_large:
+                extrema = self._get_chunked_extrema(ignore_nan)
+            else:
+                extrema = get_extrema(self.data, ignore_nan)
+            self._extrema[ignore_nan] = extrema
+        return self._extrema[ignore_nan]
+
+    def _get_chunked_extrema(self, ignore_nan):
+        mins = []
+        maxs = []
+        for chunk in iter_chunks(self.var):
+            chunk_min, chunk_max = get_extrema(self.var[chunk], ignore_nan)
+            # Skip chunks with no valid points, for which get_extrema
+            # returns masked values.
+            if chunk_min is not np.ma.masked:
+                mins.append(chunk_min)
+                maxs.append(chunk_max)
+        if not mins:
+            return np.ma.masked, np.ma.masked
+        return np.min(mins), np.max(maxs)
+
+    def matches_values(self, values):
+        # Large variables are compared a block at a time, stopping at the
+        # first block which doesn't match. This follows the same rules as
+        # check_values, so values which broadcast the data to a larger
+        # shape are compared against the data read in full, and masked
+        # points are skipped, failing only if every point is masked.
+        if self._data is not None or not self.is_large:
+            return check_values(self.data, values)
+        expected = np.asarray(values)
+        try:
+            shape = np.broadcast_shapes(self.var.shape, expected.shape)
+        except ValueError:
+            return False
+        if shape != self.var.shape:
+            return check_values(self.data, values)
+        expected = np.broadcast_to(expected, shape)
+        matched = False
+        for chunk in iter_chunks(self.var):
+            result = np.all(self.var[chunk] == expected[chunk])
+            if result is np.ma.masked:
+                # A block with no unmasked points has nothing to compare.
+                continue
+            if not result:
+                return False
+            matched = True
+        return matched
+
+    def has_masked_points(self):
+        # Large variables are read a block at a time, stopping as soon as
+        # a block holding masked points is found.
+        if self._data is not None or not self.is_large:
+            return np.ma.is_masked(self.data)
+        return any(np.ma.is_masked(self.var[chunk])
+                   for chunk in iter_chunks(self.var))
+
+    def get_interval_data(self, name):
+        # Coordinate variables referenced by interval checks are often
+        # shared between many variables, so only read each of them once.
+        if name not in self.interval_data:
+            self.interval_data[name] = self.product[name][:]
+        return self.interval_data[name]
+
+
+def _check_required_values(ctx, key, spec):
+    if ctx.matches_values(spec):
+        ctx.logger.info("OK: %s : %s", ctx.name, key)
+        return 0
+    ctx.logger.error("%s : %s", ctx.name, key)
+    return 1
+
+
+def _check_required_range(ctx, key, spec):
+    # NaNs are neither inside nor outside the range, so leave them out
+    # rather than letting them hide any values which are outside it. The
+    # extrema are shared with the min/max check, so only reduce the data
+    # again if they turn out to be NaN.
+    datamin, datamax = ctx.get_extrema()
+    if datamin != datamin or datamax != datamax:
+        datamin, datamax = ctx.get_extrema(ignore_nan=True)
+    if datamin < spec[0] or datamax > spec[1]:
+        ctx.logger.error("%s : %s - outside allowed range", ctx.name, key)
+        return 1
+    ctx.logger.info("OK: %s : %s", ctx.name, key)
+    return 0
+
+
+def _check_required_min_max(ctx, key, spec):
+    datamin, datamax = ctx.get_extrema()
+    if datamin != spec[0] or datamax != spec[1]:
+        ctx.logger.error(
+            "%s : %s - min_max values don't align with specification",
+            ctx.name, key)
+        return 1
+    ctx.logger.info("OK: %s : %s", ctx.name, key)
+    return 0
+
+
+def _check_required_attributes(ctx, key, spec):
+    errcount = 0
+    for attname in spec:
+        if attname not in ctx.attrs:
+            ctx.logger.error(
+                "%s : required attribute missing : %s", ctx.name, attname)
+            errcount += 1
+        else:
+            ctx.logger.info("OK: %s attribute present for %s",
+                            attname, ctx.name)
+    return errcount
+
+
+def _check_required_intervals(ctx, key, spec):
+    # required intervals may be specified for a related
+    # variables in dictionary format or directly on the
+    # variable itself
+    if not isinstance(spec, dict):
+        if not check_stepsize(ctx.data, spec):
+            ctx.logger.error("%s: %s not matched", ctx.name, key)
+            return 1
+        ctx.logger.info("OK: %s : %s", ctx.name, key)
+        return 0
+
+    errcount = 0
+    startdate = ctx.global_attrs.get('forecast_reference_time')
+    for intervalkey in spec:
+        if intervalkey in ctx.var_names:
+            arr = ctx.get_interval_data(intervalkey)
+            step = spec[intervalkey]
+
+            # Check that monthly or yearly files have a stepsize of 1
+            # month or 1 year. Otherwise we use the hourly value
+            # specified in the json file. Monthly or yearly files are
+            # specified with "month" or "years" in the json file,
+            # respectively.
+            if isinstance(step, str):
+                if step in ALLOWED_PERIODS:
+                    # Replace the period with the string given in the
+                    # json file, and specify a step-size of 1.
+                    period, step = step, 1
+                else:
+                    sys.exit(
+                        f'Interval checks for period '
+                        '{step} not yet implemented.')
+            else:
+                # If the interval given in the json file is 24 hours,
+                # then specify a period of "days" over which to perform
+                # the interval check.
+                if step == 24:
+                    period, step = 'days', 1
+                else:
+                    period = 'hours'
+
+            if not check_stepsize(arr, step, startdate, period):
+                ctx.logger.error("%s: %s not matched", ctx.name, key)
+                errcount += 1
+            else:
+                ctx.logger.info("OK: %s : %s - %s",
+                                ctx.name, key, intervalkey)
+        else:
+            ctx.logger.error("%s not in file", intervalkey)
+    return errcount
+
+
+def _check_bounds(ctx, key, spec):
+    # Check for presence of expected bounds
+    # - any checking of bounds themselves is done as if it were
+    #   a normal variable
+    errcount = 0
+    for bound in spec:
+        if bound not in ctx.var_names:
+            ctx.logger.error("%s not found", bound)
+            errcount += 1
+        else:
+            ctx.logger.info("OK: %s : %s", ctx.name, bound)
+    return errcount
+
+
+def _check_cell_methods(ctx, key, spec):
+    # Cell methods can be a pattern so just match outright
+    if match_pattern(spec, ctx.attrs[key]):
+        ctx.logger.info("OK: %s : %s", ctx.name, key)
+        return 0
+    ctx.logger.error("%s : %s mismatch", ctx.name, key)
+    return 1
+
+
+def _check_dimensions(ctx, key, spec):
+    if ctx.dimensions != spec:
+        ctx.logger.error(
+            "Dimensions mismatch got: %s should have: %s",
+            list(ctx.dimensions),
+            list(spec) if isinstance(spec, tuple) else spec)
+        return 1
+    ctx.logger.info("OK: %s : %s", ctx.name, key)
+    return 0
+
+
+def _check_global_value(ctx, key, spec):
+    # Checking global attribute values are correct for this variable if
+    # explicitly specified e.g. frequency is the expected value of "day"
+    # rather than just a valid possible entry as specified in the global
+    # details.
+    if key not in ctx.global_attrs:
+        ctx.logger.error("%s:%s global missing", ctx.name, key)
+        return 1
+    if ctx.global_attrs[key] != spec:
+        ctx.logger.error("%s:%s mismatch", ctx.name, key)
+        return 1
+    ctx.logger.info("OK: %s : %s", ctx.name, key)
+    return 0
+
+
+def _check_attribute_value(ctx, key, spec):
+    if key not in ctx.attrs:
+        ctx.logger.error("%s : %s missing", ctx.name, key)
+        return 1
+    if ctx.attrs[key] != spec:
+        ctx.logger.error("Mismatch for %s %s", ctx.name, key)
+        return 1
+    ctx.logger.info("OK: %s : %s", ctx.name, key)
+    return 0
+
+
+def _check_not_implemented(ctx, key, spec):
+    ctx.logger.error("required check %s Not implemented", key)
+    return 0
+
+
+# Checks carried out for each of the known keys in a variable's config.
+# Other "required_" keys are not implemented, keys naming a required global
+# attribute check the value of that global and any remaining keys check the
+# value of the variable's attribute of the same name.
+VARIABLE_CHECKS = {
+    "required_values": _check_required_values,
+    "required_range": _check_required_range,
+    "required_min_max": _check_required_min_max,
+    "required_attributes": _check_required_attributes,
+    "required_intervals": _check_required_intervals,
+    "bounds": _check_bounds,
+    "cell_methods": _check_cell_methods,
+    "dimensions": _check_dimensions,
+}
+
+
+def compile_constraints(constraints):
+    """
+    Work out which check to carry out for every entry in the variable
+    definitions of the constraints. simple_variable_checks does this once
+    per file up front, rather than again for each variable in the file.
+
+    Returns a dictionary mapping each variable to a list of (key, check,
+    spec) tuples, in the order the entries appear in the constraints.
+
+    """
+    required_globals = frozenset(
+        constraints.get('required_global_attributes', ()))
+
+    compiled = {}
+    for variable, entries in constraints.items():
+        if not isinstance(entries, dict):
+            continue
+        checks = []
+        for key, spec in entries.items():
+            check = VARIABLE_CHECKS.get(key)
+            if check is None:
+                if key.startswith("required"):
+                    check = _check_not_implemented
+                elif key in required_globals:
+                    check = _check_global_value
+                else:
+                    check = _check_attribute_value
+            if key == "dimensions" and isinstance(spec, list):
+                # Dimensions are compared with the variable's tuple of
+                # dimension names, so avoid building a list per variable.
+                spec = tuple(spec)
+            checks.append((key, check, spec))
+        compiled[variable] = checks
+    return compiled
 
 
 def simple_variable_checks(product, constraints, strict=False, logger=None):
@@ -259,184 +710,45 @@ def simple_variable_checks(product, constraints, strict=False, logger=None):
     if not isinstance(logger, logging.Logger):
         logger = initialise_logger(verbosity=logging.CRITICAL)
 
+    # Shared between variables so that interval coordinates are read once.
+    interval_data = {}
+
+    var_names = frozenset(product.variables)
+
+    # Read all the global attributes once for the checks on global values.
+    global_attrs = {key: product.getncattr(key) for key in product.ncattrs()}
+
+    compiled = compile_constraints(constraints)
+    allowed_dims = frozenset(constraints.get('allowed_dimensions', ()))
+
     for variable in product.variables:
-        logger.info("Checking %s" % variable)
+        logger.info("Checking %s", variable)
+        ctx = VariableContext(product, variable, var_names, global_attrs,
+                              interval_data, logger)
+
         # If running in strict mode _FillValue should only be present if used
         if strict:
-            if "_FillValue" in product[variable].ncattrs():
-                if not np.ma.is_masked(product[variable][:]):
+            if "_FillValue" in ctx.attrs:
+                if not ctx.has_masked_points():
                     errcount += 1
-                    logger.error("%s : _FillValue present but unused" %
+                    logger.error("%s : _FillValue present but unused",
                                  variable)
 
         # Catch completely unknown variables - those not in either the
         # constraints or list of allowed dimensions
         if variable not in constraints:
             # If variable is an allowed dimension then no error to raise.
-            if 'allowed_dimensions' in constraints and \
-                    variable in constraints['allowed_dimensions']:
+            if variable in allowed_dims:
                 continue
             if strict:
-                logger.error("Unknown variable %s" % variable)
+                logger.error("Unknown variable %s", variable)
                 errcount += 1
             else:
-                logger.warn("Unknown Variable %s" % variable)
+                logger.warn("Unknown Variable %s", variable)
                 warncount += 1
         elif variable in constraints:
-            for key in constraints[variable]:
-                if key == "required_values":
-                    if np.all(product[variable][:] ==
-                              constraints[variable][key]):
-                        logger.info("OK: %s : %s" % (variable, key))
-                    else:
-                        logger.error("%s : %s" % (variable, key))
-                        errcount += 1
-                elif key == "required_range":
-                    datrange = constraints[variable][key]
-                    if np.any(product[variable][:] < datrange[0]) or \
-                            np.any(product[variable][:] > datrange[1]):
-                        logger.error("%s : %s - outside allowed range" %
-                                     (variable, key))
-                        errcount += 1
-                    else:
-                        logger.info("OK: %s : %s" % (variable, key))
-                elif key == "required_min_max":
-                    minmax = constraints[variable][key]
-                    if np.amin(product[variable][:]) != minmax[0] or \
-                            np.amax(product[variable][:]) != minmax[1]:
-                        logger.error(
-                            ("%s : %s - min_max values don't align with "
-                             "specification") %
-                            (variable, key))
-                        errcount += 1
-                    else:
-                        logger.info("OK: %s : %s" % (variable, key))
-                elif key == "required_attributes":
-                    for attname in constraints[variable][key]:
-                        if attname not in product[variable].ncattrs():
-                            logger.error(
-                                "%s : required attribute missing : %s"
-                                % (variable, attname))
-                            errcount += 1
-                        else:
-                            logger.info("OK: %s attribute present for %s" %
-                                        (attname, variable))
-                elif key == "required_intervals":
-                    # required intervals may be specified for a related
-                    # variables in dictionary format or directly on the
-                    # variable itself
-                    if isinstance(constraints[variable][key], dict):
-                        for intervalkey in constraints[variable][key]:
-                            if intervalkey in product.variables:
-                                arr = product[intervalkey][:]
-                                step = constraints[variable][key][intervalkey]
-
-                                startdate = product.forecast_reference_time
-                                # Check that monthly or yearly files
-                                # have a stepsize of 1 month or 1
-                                # year. Otherwise we use the hourly
-                                # value specified in the json file.
-                                # Monthly or yearly files are
-                                # specified with "month" or "years" in
-                                # the json file, respectively.
-                                if isinstance(step, str):
-                                    if step in ALLOWED_PERIODS:
-                                        # Replace the period with the
-                                        # string given in the json
-                                        # file, and specify a
-                                        # step-size of 1.
-                                        period, step = step, 1
-                                    else:
-                                        sys.exit(
-                                            f'Interval checks for period '
-                                            '{step} not yet implemented.')
-                                else:
-                                    # If the interval given in the json
-                                    # file is 24 hours, then specify a period
-                                    # of "days" over which to perform the
-                                    # interval check.
-                                    if step == 24:
-                                        period, step = 'days', 1
-                                    else:
-                                        period = 'hours'
-
-                                if not check_stepsize(arr, step, startdate,
-                                                      period):
-                                    logger.error(
-                                        "%s: %s not matched" % (variable, key))
-                                    errcount += 1
-                                else:
-                                    logger.info("OK: %s : %s - %s" %
-                                                (variable, key, intervalkey))
-                            else:
-                                logger.error("%s not in file" % intervalkey)
-                    else:
-                        arr = product[variable][:]
-                        step = constraints[variable][key]
-                        if not check_stepsize(arr, step):
-                            logger.error(
-                                "%s: %s not matched" % (variable, key))
-                            errcount += 1
-                        else:
-                            logger.info("OK: %s : %s" % (variable, key))
-                elif key.startswith("required"):
-                    logger.error("required check %s Not implemented" % key)
-                elif key == "bounds":
-                    # Check for presence of expected bounds
-                    # - any checking of bounds themselves is done as if it were
-                    #   a normal variable
-                    for bound in constraints[variable][key]:
-                        if bound not in product.variables:
-                            logger.error("%s not found" % bound)
-                            errcount += 1
-                        else:
-                            logger.info("OK: %s : %s" % (variable, bound))
-                elif key == "cell_methods":
-                    # Cell methods can be a pattern so just match outright
-                    if match_pattern(constraints[variable][key],
-                                     product[variable].getncattr(key)):
-                        logger.info("OK: %s : %s" % (variable, key))
-                    else:
-                        logger.error("%s : %s mismatch" % (variable, key))
-                        errcount += 1
-                elif key == "dimensions":
-                    if list(product[variable].dimensions) != \
-                            constraints[variable][key]:
-                        logger.error(
-                            "Dimensions mismatch got: %s should have: %s" %
-                            (str(list(product[variable].dimensions)),
-                             str(constraints[variable][key])))
-                        errcount += 1
-                    else:
-                        logger.info("OK: %s : %s" % (variable, key))
-                elif "required_global_attributes" in constraints and \
-                        key in constraints['required_global_attributes']:
-                    # Checking global attribute values are correct for this
-                    # variable if explicitly specified e.g. frequency is the
-                    # expected value of "day" rather than just a valid possible
-                    # entry as specified in the global details.
-                    if key in product.ncattrs():
-                        if product.getncattr(key) == \
-                                constraints[variable][key]:
-                            logger.info("OK: %s : %s" % (variable, key))
-                        else:
-                            logger.error("%s:%s mismatch" % (variable, key))
-                            errcount += 1
-                    else:
-                        logger.error("%s:%s global missing" % (variable, key))
-                        errcount += 1
-                else:
-                    if key in product[variable].ncattrs():
-                        if product[variable].getncattr(key) != \
-                                constraints[variable][key]:
-                            logger.error(
-                                "Mismatch for %s %s" % (variable, key))
-                            errcount += 1
-                        else:
-                            logger.info("OK: %s : %s" % (variable, key))
-                    else:
-                        logger.error("%s : %s missing" % (variable, key))
-                        errcount += 1
+            for key, check, spec in compiled.get(variable, ()):
+                errcount += check(ctx, key, spec)
 
     return errcount, warncount
 
@@ -464,13 +776,13 @@ if __name__ == "__main__":
     try:
         product = load_input(args.input_file)
     except IOError as err:
-        logger.critical("Unable to load: %s" % args.input_file)
+        logger.critical("Unable to load: %s", args.input_file)
         sys.exit(1)
 
     try:
         constraints = load_constraints(args.config_path)
     except IOError as err:
-        logger.critical("Unable to load: %s" % args.config_path)
+        logger.critical("Unable to load: %s", args.config_path)
         sys.exit(1)
 
     # Keep a running total of number of errors found
@@ -493,9 +805,9 @@ if __name__ == "__main__":
     warncount += warns
 
     if errcount > 0:
-        logger.critical("%s errors found" % errcount)
+        logger.critical("%s errors found", errcount)
     if warncount > 0:
-        logger.warn("%s warnings raised" % warncount)
+        logger.warn("%s warnings raised", warncount)
 
     if errcount > 0:
         sys.exit(1)
@@ -30,25 +30,45 @@
 # ARISING IN ANY WAY OUT OF THE USE OF THIS SOFTWARE, EVEN IF ADVISED OF THE
 # POSSIBILITY OF SUCH DAMAGE.
 
-import copy
 import os
+import re
+import contextlib
 import json
+import shutil
 import unittest
 import tempfile
 import time
 import numpy
-import netCDF4
 import logging
 
+from types import MappingProxyType
+from unittest import mock
+
+import ncdfchecker
 from ncdfchecker import *
 
 
-TEMPDIR = tempfile.mkdtemp()
-datapath = os.path.join(TEMPDIR, "test.nc")
-jsonpath = os.path.join(TEMPDIR, "test.json")
+# Created by setUpModule, so that merely importing or collecting the tests
+# leaves nothing behind
+TEMPDIR = None
+
+# Coordinate values shared by the constraints and the example file
+_LAT_VALS = [float(lat) for lat in range(-90, 100, 10)]
+_LON_VALS = [float(lon) for lon in range(0, 370, 10)]
+
+# Leadtimes (hours) written to the time axis of each product's example file
+_TIME_VALS_6HR = numpy.arange(0., 24., 6.)
+_TIME_VALS_MONTHLY = numpy.array([372.0, 1080.0, 1788.0, 2520.0, 3252.0])
+_TIME_VALS_DAY = numpy.array([684., 708., 732., 756., 780., 804., 828., 852.])
+_TIME_VALS_YEARLY = numpy.array([4380., 13140.])
+
+# A 6-hourly axis with one step out of place
+_IRREGULAR_6HR = numpy.array([0., 8., 12., 18.])
 
-# Basic set of constraints to test against
-test_constraints = {
+# Basic set of constraints to test against. It is read-only at the top
+# level so that tests cannot change it for each other by accident; use
+# override_constraints to derive a variant.
+test_constraints = MappingProxyType({
     "lat": {
         "axis": "Y",
         "dimensions": [
@@ -68,7 +88,7 @@ test_constraints = {
             -90.0,
             90.0
         ],
-        "required_values": numpy.arange(-90.0, 100.0, 10.0).tolist(),
+        "required_values": _LAT_VALS,
         "standard_name": "latitude"
     },
     "lon": {
@@ -90,7 +110,7 @@ test_constraints = {
             0.0,
             360.0
         ],
-        "required_values": numpy.arange(0.0, 370.0, 10.0).tolist(),
+        "required_values": _LON_VALS,
         "standard_name": "longitude"
     },
     "testfield": {
@@ -124,66 +144,176 @@ test_constraints = {
     "creation_date": {
         "pattern": "\\d\\d\\d\\d-\\d\\d-\\d\\d \\d\\d:\\d\\d"
     },
-}
+})
 
 
-def create_example_files(time_vals=numpy.arange(0, 24, 6), freq='6hr',
-                         constraints=test_constraints):
+def create_example_files(datapath, time_vals=_TIME_VALS_6HR, freq='6hr'):
     """
-    Create a basic netcdf file that can be used for testing against and
-    dump an example json file for testing reading routine.
+    Create a basic netcdf file that can be used for testing against.
     """
+    # As in ncdfchecker, only load netCDF4 when a file is needed.
+    import netCDF4
 
-    data = netCDF4.Dataset(datapath, 'w', format='NETCDF4')
-    lats = numpy.arange(-90.0, 100.0, 10.0)
-    lons = numpy.arange(0.0, 370.0, 10.0)
+    # Build the file in memory and write it out in one go on close
+    data = netCDF4.Dataset(datapath, 'w', format='NETCDF4',
+                           diskless=True, persist=True)
+    lats = _LAT_VALS
+    lons = _LON_VALS
 
     # Create Dimensions
-    data.createDimension('time', None)
+    data.createDimension('time', len(time_vals))
     data.createDimension('lat', len(lats))
     data.createDimension('lon', len(lons))
 
     # variables
-    time_var = data.createVariable('time', 'f8', ('time',))
+    # Every variable is written in full, so skip the fill-value prefill
+    time_var = data.createVariable('time', 'f8', ('time',),
+                                   contiguous=True, fill_value=False)
     time_var[:] = time_vals
-    lat = data.createVariable('lat', 'f4', ('lat',))
+    lat = data.createVariable('lat', 'f4', ('lat',),
+                              contiguous=True, fill_value=False)
     lat[:] = lats
-    lon = data.createVariable('lon', 'f4', ('lon',))
+    lon = data.createVariable('lon', 'f4', ('lon',),
+                              contiguous=True, fill_value=False)
     lon[:] = lons
-    testfield = \
-        data.createVariable('testfield', 'f8', ('time', 'lat', 'lon',))
-    for t_val in range(len(time_var)):
-        testfield[t_val, :, :] = \
-            numpy.random.uniform(size=(len(lat), len(lon)))
+    testfield = data.createVariable(
+        'testfield', 'f8', ('time', 'lat', 'lon',),
+        contiguous=True, fill_value=False)
+    # A freshly seeded generator for each file, so that the test field is
+    # the same however the tests are selected and ordered.
+    rng = numpy.random.default_rng(0)
+    testfield[:] = rng.random((len(time_vals), len(lats), len(lons)),
+                              dtype=numpy.float32)
 
     # Metadata
-    lat.axis = "Y"
-    lat.long_name = "latitude"
-    lat.standard_name = "latitude"
-
-    lon.axis = "X"
-    lon.long_name = "longitude"
-    lon.standard_name = "longitude"
-
-    testfield.cell_methods = "time: point"
-    testfield.frequency = freq
-    testfield.long_name = "Test Field"
-    testfield.modeling_realm = "atmos"
-    testfield.standard_name = "test_field"
-    testfield.units = "1"
-
-    data.title = "Nosetest exemplar dataset"
-    data.source = "Generated by test_product_validator.py"
-    data.creation_date = time.strftime("%Y-%m-%d %H:%M")
-    data.frequency = freq
-    data.short_name = "testfield"
-    data.forecast_reference_time = '1993-01-01T00:00:00Z'
+    lat.setncatts({
+        "axis": "Y",
+        "long_name": "latitude",
+        "standard_name": "latitude",
+    })
+
+    lon.setncatts({
+        "axis": "X",
+        "long_name": "longitude",
+        "standard_name": "longitude",
+    })
+
+    testfield.setncatts({
+        "cell_methods": "time: point",
+        "frequency": freq,
+        "long_name": "Test Field",
+        "modeling_realm": "atmos",
+        "standard_name": "test_field",
+        "units": "1",
+    })
+
+    data.setncatts({
+        "title": "Nosetest exemplar dataset",
+        "source": "Generated by test_product_validator.py",
+        "creation_date": time.strftime("%Y-%m-%d %H:%M"),
+        "frequency": freq,
+        "short_name": "testfield",
+        "forecast_reference_time": '1993-01-01T00:00:00Z',
+    })
 
     data.close()
+    return
+
+
+# The creation_date pattern, compiled once for the tests that take a Pattern
+_CREATION_DATE_RE = re.compile(test_constraints['creation_date']['pattern'])
+
+
+def override_constraints(key, **fields):
+    """
+    Return a copy of test_constraints with fields of one entry replaced.
+
+    Only the overridden entry is copied; the rest is shared with
+    test_constraints, so the result must not be modified in place.
+    """
+    constraints = dict(test_constraints)
+    constraints[key] = {**test_constraints[key], **fields}
+    return constraints
+
+
+# Substitute the 6-hourly field with monthly, daily and yearly settings.
+monthly_test_constraints = override_constraints(
+    'testfield', frequency='mon', required_intervals={'time': 'month'})
+day_test_constraints = override_constraints(
+    'testfield', frequency='day', required_intervals={'time': 24})
+yearly_test_constraints = override_constraints(
+    'testfield', frequency='years', required_intervals={'time': 'years'})
+
 
-    with open(jsonpath, 'w') as outfile:
-        json.dump(constraints, outfile, sort_keys=True, indent=4,
-                  ensure_ascii=False)
+def dump_constraints(constraints):
+    """
+    Serialise constraints to the bytes of an example json file.
+    """
+    return json.dumps(dict(constraints), sort_keys=True, indent=4,
+                      ensure_ascii=False).encode('utf-8')
+
+
+def create_constraints_file(jsonpath, contents):
+    """
+    Write an example json file for testing reading routine.
+    """
+    with open(jsonpath, 'wb') as outfile:
+        outfile.write(contents)
+    return
+
+
+# One json file per constraints variant, written once per run
+jsonpath = monthly_jsonpath = day_jsonpath = yearly_jsonpath = None
+
+
+def setUpModule():
+    global TEMPDIR, jsonpath, monthly_jsonpath, day_jsonpath, yearly_jsonpath
+    # Keep the fixtures in memory-backed storage where the host provides it
+    TEMPDIR = tempfile.mkdtemp(
+        dir='/dev/shm' if os.path.isdir('/dev/shm') else None)
+    jsonpath = os.path.join(TEMPDIR, "test.json")
+    monthly_jsonpath = os.path.join(TEMPDIR, "test_monthly.json")
+    day_jsonpath = os.path.join(TEMPDIR, "test_day.json")
+    yearly_jsonpath = os.path.join(TEMPDIR, "test_yearly.json")
+    for path, constraints in ((jsonpath, test_constraints),
+                              (monthly_jsonpath, monthly_test_constraints),
+                              (day_jsonpath, day_test_constraints),
+                              (yearly_jsonpath, yearly_test_constraints)):
+        create_constraints_file(path, dump_constraints(constraints))
+
+
+def read_in_small_blocks():
+    """
+    Have ncdfchecker treat every variable as large, and work through it
+    two 8 byte values at a time, so that results are combined across
+    many blocks.
+    """
+    return mock.patch.multiple(ncdfchecker, LARGE_VARIABLE_SIZE=0,
+                               CHUNK_READ_SIZE=16)
+
+
+def create_field_dataset(values, fill_value=None):
+    """
+    Create an in-memory dataset holding the given values in a single
+    one dimensional variable called "field".
+    """
+    import netCDF4
+
+    data = netCDF4.Dataset('field.nc', 'w', diskless=True)
+    data.createDimension('x', len(values))
+    field = data.createVariable('field', 'f8', ('x',), fill_value=fill_value)
+    field[:] = values
+    return data
+
+
+def remove_file(path):
+    """
+    Cleanup a temporary file.
+    """
+    try:
+        os.remove(path)
+    except OSError:
+        pass
     return
 
 
@@ -198,32 +328,32 @@ class StubLogger(logging.Logger):
         self.infos = []
         self.warns = []
 
-    def error(self, msg):
-        self.errors.append(msg)
+    def error(self, msg, *args):
+        self.errors.append(msg % args if args else msg)
 
-    def info(self, msg):
-        self.infos.append(msg)
+    def info(self, msg, *args):
+        self.infos.append(msg % args if args else msg)
 
-    def warn(self, msg):
-        self.warns.append(msg)
+    def warn(self, msg, *args):
+        self.warns.append(msg % args if args else msg)
 
 
 class TestProductValidator(unittest.TestCase):
-    def setUp(self):
-        create_example_files()
-        self.data = load_input(datapath)
+    @classmethod
+    def setUpClass(cls):
+        cls.datapath = os.path.join(TEMPDIR, cls.__name__ + ".nc")
 
-        self.by_hours = 'hours'
+        create_example_files(cls.datapath)
+        cls.data = load_input(cls.datapath)
+        cls.time_arr = cls.data['time'][:]
 
-    def tearDown(self):
-        """
-        Cleanup temporary files
-        """
-        try:
-            os.remove(datapath)
-        except OSError:
-            pass
-        return
+    @classmethod
+    def tearDownClass(cls):
+        cls.data.close()
+        remove_file(cls.datapath)
+
+    def setUp(self):
+        self.by_hours = 'hours'
 
     def test_load_constraints_ok(self):
         """
@@ -232,6 +362,21 @@ class TestProductValidator(unittest.TestCase):
         cons = load_constraints(jsonpath)
         assert cons == test_constraints
 
+    def test_load_constraints_orjson_fallback(self):
+        """
+        Test constraints orjson can't parse, such as those holding NaN, are
+        loaded with json instead
+        """
+        nanpath = os.path.join(TEMPDIR, "test_nan.json")
+        create_constraints_file(nanpath, b'{"lat": {"valid_min": NaN}}')
+        fake_orjson = mock.Mock(JSONDecodeError=ValueError)
+        fake_orjson.loads.side_effect = ValueError
+        with mock.patch.object(ncdfchecker, 'orjson', fake_orjson):
+            cons = load_constraints(nanpath)
+        remove_file(nanpath)
+        fake_orjson.loads.assert_called_once()
+        assert numpy.isnan(cons['lat']['valid_min'])
+
     def test_load_input_ok(self):
         """
         Test routine for loading of input from netcdf file
@@ -240,8 +385,9 @@ class TestProductValidator(unittest.TestCase):
         returned. Anything more in depth would basically involve writing a
         version of the checker here.
         """
-        data = load_input(datapath)
+        data = load_input(self.datapath)
         assert data is not None and data.title == "Nosetest exemplar dataset"
+        data.close()
 
     def test_match_pattern_ok(self):
         """
@@ -250,6 +396,12 @@ class TestProductValidator(unittest.TestCase):
         assert match_pattern(test_constraints['creation_date']['pattern'],
                              self.data.creation_date)
 
+    def test_match_pattern_compiled_ok(self):
+        """
+        Test pattern matching accepts an already compiled pattern
+        """
+        assert match_pattern(_CREATION_DATE_RE, self.data.creation_date)
+
     def test_match_pattern_fail(self):
         """
         Test pattern matching will fail on mismatch
@@ -263,7 +415,7 @@ class TestProductValidator(unittest.TestCase):
         Test check correct stepsize matching
         """
         step = test_constraints['testfield']['required_intervals']['time']
-        assert check_stepsize(self.data['time'][:], step,
+        assert check_stepsize(self.time_arr, step,
                               self.data.forecast_reference_time,
                               self.by_hours)
 
@@ -272,7 +424,7 @@ class TestProductValidator(unittest.TestCase):
         Test check stepsize fails on mismatch
         """
         step = test_constraints['testfield']['required_intervals']['time'] + 1
-        assert not (check_stepsize(self.data['time'][:], step,
+        assert not (check_stepsize(self.time_arr, step,
                                    self.data.forecast_reference_time,
                                    self.by_hours))
 
@@ -282,11 +434,107 @@ class TestProductValidator(unittest.TestCase):
         steps
         """
         step = 6
-        irregset = numpy.array([0., 8., 12., 18.])
-        assert not check_stepsize(irregset, step,
+        assert not check_stepsize(_IRREGULAR_6HR, step,
                                   self.data.forecast_reference_time,
                                   self.by_hours)
 
+    def test_check_values_ok(self):
+        """
+        Test check values matching
+        """
+        assert check_values(self.data['lat'][:],
+                            test_constraints['lat']['required_values'])
+
+    def test_check_values_shape_fail(self):
+        """
+        Test check values fails when the number of values doesn't match
+        """
+        assert not check_values(
+            self.data['lat'][:],
+            test_constraints['lat']['required_values'][:-1])
+
+    def test_get_extrema_masked(self):
+        """
+        Test masked points are ignored when finding the extrema
+        """
+        data = numpy.ma.masked_values([1e20, 2.0, -3.0, 1e20], 1e20)
+        assert get_extrema(data) == (-3.0, 2.0)
+
+    def test_iter_chunks_covers_variable(self):
+        """
+        Test the chunks of a variable cover all of its data exactly once
+        """
+        var = self.data['testfield']
+        counts = numpy.zeros(var.shape, dtype=int)
+        for chunk in iter_chunks(var):
+            counts[chunk] += 1
+        assert numpy.all(counts == 1)
+
+    def test_iter_chunks_covers_chunked_variable(self):
+        """
+        Test the blocks of a chunked variable cover all of its data exactly
+        once
+        """
+        import netCDF4
+
+        with netCDF4.Dataset('chunked.nc', 'w', diskless=True) as data:
+            data.createDimension('time', 5)
+            data.createDimension('lat', len(_LAT_VALS))
+            var = data.createVariable('field', 'f8', ('time', 'lat'),
+                                      chunksizes=(2, 7))
+            counts = numpy.zeros(var.shape, dtype=int)
+            for chunk in iter_chunks(var):
+                counts[chunk] += 1
+        assert numpy.all(counts == 1)
+
+    def test_iter_chunks_groups_storage_chunks(self):
+        """
+        Test blocks are made of whole storage chunks, spanning the last
+        dimensions in full where they fit and grouping chunks along the
+        next dimension in
+        """
+        import netCDF4
+
+        with netCDF4.Dataset('chunked.nc', 'w', diskless=True) as data:
+            data.createDimension('time', 10)
+            data.createDimension('lat', 21)
+            var = data.createVariable('field', 'f8', ('time', 'lat'),
+                                      chunksizes=(2, 7))
+            # Room for two rows of storage chunks spanning all latitudes.
+            with mock.patch.object(ncdfchecker, 'CHUNK_READ_SIZE',
+                                   2 * 2 * 21 * 8):
+                blocks = list(iter_chunks(var))
+            assert blocks == [(slice(start, start + 4), slice(0, 21))
+                              for start in range(0, 10, 4)]
+
+            # Too little room for a row of chunks spanning all latitudes.
+            with mock.patch.object(ncdfchecker, 'CHUNK_READ_SIZE',
+                                   2 * 2 * 7 * 8):
+                blocks = list(iter_chunks(var))
+            assert blocks == [(slice(start, start + 2), slice(lat, lat + 14))
+                              for start in range(0, 10, 2)
+                              for lat in (0, 14)]
+
+    def test_iter_chunks_splits_large_slabs(self):
+        """
+        Test a contiguous variable whose first dimension holds a single
+        slab larger than a block is split along its next dimension
+        """
+        import netCDF4
+
+        with netCDF4.Dataset('contiguous.nc', 'w', diskless=True) as data:
+            data.createDimension('time', 1)
+            data.createDimension('lat', 30)
+            data.createDimension('lon', 40)
+            var = data.createVariable('field', 'f8', ('time', 'lat', 'lon'),
+                                      contiguous=True)
+            # Room for seven rows of longitudes.
+            with mock.patch.object(ncdfchecker, 'CHUNK_READ_SIZE',
+                                   7 * 40 * 8):
+                blocks = list(iter_chunks(var))
+        assert blocks == [(slice(0, 1), slice(lat, lat + 7), slice(0, 40))
+                          for lat in range(0, 30, 7)]
+
     def test_check_globals_ok(self):
         """
         Test check_globals matching
@@ -298,8 +546,8 @@ class TestProductValidator(unittest.TestCase):
         """
         Test check_globals expected failure
         """
-        bad_constraints = copy.deepcopy(test_constraints)
-        bad_constraints['creation_date']['pattern'] = "\\d\\d\\d\\dZ"
+        bad_constraints = override_constraints(
+            'creation_date', pattern="\\d\\d\\d\\dZ")
         assert (check_globals(self.data, bad_constraints) == (1, 0))
 
     def test_check_globals_strict_ok(self):
@@ -313,12 +561,24 @@ class TestProductValidator(unittest.TestCase):
         """
         Test check_globals strict mode expected failure
         """
-        unmet_constraints = copy.deepcopy(test_constraints)
+        unmet_constraints = dict(test_constraints)
         unmet_constraints['required_global_attributes'] = [
             "title", "source", "forecast_reference_time"]
         assert (check_globals(
             self.data, unmet_constraints, strict=True) == (3, 0))
 
+    def test_compile_constraints(self):
+        """
+        Test the checks are resolved for each variable's config entries
+        """
+        compiled = compile_constraints(test_constraints)
+        assert 'required_global_attributes' not in compiled
+        checks = {key: check for key, check, _ in compiled['testfield']}
+        assert checks['required_range'] is \
+            ncdfchecker.VARIABLE_CHECKS['required_range']
+        assert checks['frequency'] is ncdfchecker._check_global_value
+        assert checks['units'] is ncdfchecker._check_attribute_value
+
     def test_check_logger_creation(self):
         """
         Check the automatic creation of the logger object. The test will
@@ -342,20 +602,73 @@ class TestProductValidator(unittest.TestCase):
         assert alogger.infos[0] == 'Checking time'
         assert alogger.warns == ['Unknown Variable time']
 
+    def test_simple_variable_checks_chunked(self):
+        """
+        Check simple_variable_checks gives the same results when every
+        variable is treated as large and checked a chunk at a time.
+        """
+        alogger = StubLogger()
+        with read_in_small_blocks():
+            result = simple_variable_checks(self.data, test_constraints,
+                                            logger=alogger)
+        assert result == (0, 1)
+        assert alogger.errors == []
+
+    def test_variable_below_range_chunked(self):
+        """
+        Check values below the required range are found when the variable
+        is checked a chunk at a time.
+        """
+        alogger = StubLogger()
+        unmet_constraints = override_constraints(
+            'testfield', required_range=[0.5, 1.5])
+        with read_in_small_blocks():
+            result = simple_variable_checks(self.data, unmet_constraints,
+                                            logger=alogger)
+        assert result == (1, 1)
+        assert alogger.errors == [
+            'testfield : required_range - outside allowed range']
+
+    def test_variable_values_mismatch_chunked(self):
+        """
+        Check wrong required values are found when the variable is checked
+        a chunk at a time.
+        """
+        alogger = StubLogger()
+        unmet_constraints = override_constraints(
+            'lat', required_values=[value + 1.0 for value in _LAT_VALS])
+        with read_in_small_blocks():
+            result = simple_variable_checks(self.data, unmet_constraints,
+                                            logger=alogger)
+        assert result == (1, 1)
+        assert alogger.errors == ['lat : required_values']
+
+    def test_variable_dimensions_mismatch(self):
+        """
+        Check an error is logged if a variable's dimensions don't match
+        """
+        alogger = StubLogger()
+        unmet_constraints = override_constraints(
+            'testfield', dimensions=["time", "lon", "lat"])
+        result = simple_variable_checks(self.data, unmet_constraints,
+                                        logger=alogger)
+        assert result == (1, 1)
+        assert alogger.errors == [
+            "Dimensions mismatch got: ['time', 'lat', 'lon'] "
+            "should have: ['time', 'lon', 'lat']"]
+
     def test_variable_below_range(self):
         """
         Check an error is logged if the data values of a variable
         go below the required range.
 
-        The test data is random from 0-1. There is a chance that
-        this test will fail if the random distribution samples only values
-        bigger than 0.5.  This is very small (I think
-        0.5**(nlon*nlat*ntimes)).
+        The test data is random from 0-1, drawn from a seeded generator,
+        so some values always fall below 0.5.
         """
 
         alogger = StubLogger()
-        unmet_constraints = copy.deepcopy(test_constraints)
-        unmet_constraints['testfield']['required_range'] = [0.5, 1.5]
+        unmet_constraints = override_constraints(
+            'testfield', required_range=[0.5, 1.5])
         result = simple_variable_checks(self.data, unmet_constraints,
                                         logger=alogger)
         assert result == (1, 1)
@@ -363,47 +676,212 @@ class TestProductValidator(unittest.TestCase):
                 'testfield : required_range - outside allowed range')
 
 
-class TestMonthlyProductValidator(unittest.TestCase):
-    def setUp(self):
-        self.time_vals = numpy.array([372.0, 1080.0, 1788.0, 2520.0, 3252.0])
-        self.freq = 'mon'
+class TestVariableDataChecks(unittest.TestCase):
+    """
+    Checks on the data of a variable, run both with the data read in full
+    and with it worked through a few values at a time.
+    """
+    def check_field(self, values, constraints, strict=False, **kwargs):
+        results = []
+        for reading in (contextlib.nullcontext(), read_in_small_blocks()):
+            alogger = StubLogger()
+            with create_field_dataset(values, **kwargs) as data, reading:
+                result = simple_variable_checks(
+                    data, {'field': constraints}, strict=strict,
+                    logger=alogger)
+            results.append((result, alogger.errors))
+        assert results[0] == results[1]
+        return results[0]
 
-        # Substitute the 6-hourly field with the monthly settings..
-        self.monthly_constraints = copy.deepcopy(test_constraints)
-        self.monthly_constraints['testfield']['frequency'] = 'mon'
-        self.monthly_constraints['testfield']['required_intervals']['time'] = \
-            'month'
+    def test_get_extrema_ignore_nan(self):
+        """
+        Test NaNs are only ignored when finding the extrema if asked to
+        """
+        data = numpy.ma.array([numpy.nan, 2.0, -3.0, 1e20],
+                              mask=[False, False, False, True])
+        assert get_extrema(data, ignore_nan=True) == (-3.0, 2.0)
+        assert numpy.isnan(get_extrema(data)).all()
 
-        create_example_files(time_vals=self.time_vals, freq=self.freq,
-                             constraints=self.monthly_constraints)
+    def test_range_and_min_max_share_extrema(self):
+        """
+        Check the range and min_max checks share a single reduction of data
+        holding no NaNs
+        """
+        with create_field_dataset([0.0, 5.0, 10.0]) as data, \
+                mock.patch.object(ncdfchecker, 'get_extrema',
+                                  wraps=get_extrema) as extrema:
+            result = simple_variable_checks(
+                data, {'field': {'required_range': [0, 10],
+                                 'required_min_max': [0, 10]}},
+                logger=StubLogger())
+        assert result == (0, 0)
+        assert extrema.call_count == 1
 
-        self.data = load_input(datapath)
-        self.monthly_step = 1
-        self.by_month = 'month'
+    def test_required_range_with_nan_ok(self):
+        """
+        Check NaNs don't count as being outside the required range
+        """
+        result, errors = self.check_field(
+            [numpy.nan, 5.0, 10.0], {'required_range': [0, 10]})
+        assert result == (0, 0)
+        assert errors == []
 
-    def tearDown(self):
+    def test_required_range_with_nan_fail(self):
         """
-        Cleanup temporary files
+        Check a NaN doesn't hide values outside the required range
         """
-        try:
-            os.remove(datapath)
-        except OSError:
-            pass
-        return
+        result, errors = self.check_field(
+            [numpy.nan, 5.0, 1000.0], {'required_range': [0, 10]})
+        assert result == (1, 0)
+        assert errors == ['field : required_range - outside allowed range']
+
+    def test_required_min_max_with_nan_fail(self):
+        """
+        Check a NaN still fails the required min_max check, even after the
+        range check on the same data has ignored it
+        """
+        result, errors = self.check_field(
+            [numpy.nan, 0.0, 10.0],
+            {'required_range': [0, 10], 'required_min_max': [0, 10]})
+        assert result == (1, 0)
+        assert errors == [
+            "field : required_min_max - min_max values don't align with "
+            "specification"]
+
+    def test_required_range_later_block_fail(self):
+        """
+        Check a value outside the required range is found when it isn't in
+        the first block read
+        """
+        result, errors = self.check_field(
+            [1.0, 2.0, 3.0, 40.0], {'required_range': [0, 10]})
+        assert result == (1, 0)
+        assert errors == ['field : required_range - outside allowed range']
+
+    def test_required_min_max_across_blocks_ok(self):
+        """
+        Check the minimum and maximum are combined across all the blocks
+        """
+        result, errors = self.check_field(
+            [5.0, 1.0, 9.0, 3.0], {'required_min_max': [1, 9]})
+        assert result == (0, 0)
+        assert errors == []
+
+    def test_required_values_masked_block_ok(self):
+        """
+        Check masked points are skipped when comparing required values,
+        including a block with no unmasked points
+        """
+        values = numpy.ma.array([1.0, 2.0, 3.0, 4.0],
+                                mask=[True, True, False, False])
+        result, errors = self.check_field(
+            values, {'required_values': [9.0, 9.0, 3.0, 4.0]},
+            fill_value=-999.0)
+        assert result == (0, 0)
+        assert errors == []
+
+    def test_required_values_all_masked_fail(self):
+        """
+        Check required values fail when every point is masked
+        """
+        values = numpy.ma.array([1.0, 2.0, 3.0, 4.0], mask=True)
+        result, errors = self.check_field(
+            values, {'required_values': [1.0, 2.0, 3.0, 4.0]},
+            fill_value=-999.0)
+        assert result == (1, 0)
+        assert errors == ['field : required_values']
+
+    def test_required_values_extra_dimension_ok(self):
+        """
+        Check required values with more dimensions than the data are
+        compared the same way whether or not the data is read in full
+        """
+        result, errors = self.check_field(
+            [1.0, 2.0, 3.0], {'required_values': [[1.0, 2.0, 3.0]]})
+        assert result == (0, 0)
+        assert errors == []
+
+    def test_required_values_extra_dimension_fail(self):
+        """
+        Check a mismatch against required values with more dimensions than
+        the data is found whether or not the data is read in full
+        """
+        result, errors = self.check_field(
+            [1.0, 2.0, 3.0],
+            {'required_values': [[1.0, 2.0, 3.0], [1.0, 2.0, 4.0]]})
+        assert result == (1, 0)
+        assert errors == ['field : required_values']
+
+    def test_dimensions_not_a_list_fail(self):
+        """
+        Check a dimensions entry which isn't a list is logged as a mismatch
+        """
+        for spec, shown in ((None, 'None'), ('x', 'x')):
+            alogger = StubLogger()
+            with create_field_dataset([1.0]) as data:
+                result = simple_variable_checks(
+                    data, {'field': {'dimensions': spec}}, logger=alogger)
+            assert result == (1, 0)
+            assert alogger.errors == [
+                "Dimensions mismatch got: ['x'] should have: " + shown]
+
+    def test_strict_fill_value_used_ok(self):
+        """
+        Check no error is logged in strict mode for a _FillValue which is
+        used by the data
+        """
+        values = numpy.ma.array([1.0, 2.0, 3.0], mask=[False, True, False])
+        result, errors = self.check_field(values, {}, strict=True,
+                                          fill_value=-999.0)
+        assert result == (0, 0)
+        assert errors == []
+
+    def test_strict_fill_value_unused_fail(self):
+        """
+        Check an error is logged in strict mode for a _FillValue which
+        isn't used by the data
+        """
+        result, errors = self.check_field([1.0, 2.0, 3.0], {}, strict=True,
+                                          fill_value=-999.0)
+        assert result == (1, 0)
+        assert errors == ['field : _FillValue present but unused']
+
+
+class TestMonthlyProductValidator(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.datapath = os.path.join(TEMPDIR, cls.__name__ + ".nc")
+
+        cls.time_vals = _TIME_VALS_MONTHLY
+        cls.freq = 'mon'
+
+        create_example_files(cls.datapath, time_vals=cls.time_vals,
+                             freq=cls.freq)
+        cls.data = load_input(cls.datapath)
+        cls.time_arr = cls.data['time'][:]
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.data.close()
+        remove_file(cls.datapath)
+
+    def setUp(self):
+        self.monthly_step = 1
+        self.by_month = 'month'
 
     def test_load_constraints_ok(self):
         """
         Check constraints load ok for monthly meta-data.
         """
-        cons = load_constraints(jsonpath)
-        assert cons == self.monthly_constraints
+        cons = load_constraints(monthly_jsonpath)
+        assert cons == monthly_test_constraints
 
     def test_check_stepsize_ok(self):
         """
         Test check correct monthly stepsize matching.
         """
         assert check_stepsize(
-            self.data['time'][:], self.monthly_step,
+            self.time_arr, self.monthly_step,
             self.data.forecast_reference_time, self.by_month)
 
     def test_check_stepsize_fail(self):
@@ -413,7 +891,7 @@ class TestMonthlyProductValidator(unittest.TestCase):
         step = self.monthly_step + 1
 
         assert not check_stepsize(
-            self.data['time'][:], step,
+            self.time_arr, step,
             self.data.forecast_reference_time, self.by_month)
 
     def test_check_stepsize_irregular_stepsize_fail(self):
@@ -431,7 +909,7 @@ class TestMonthlyProductValidator(unittest.TestCase):
         because the constraint does not define time tests.
         """
         alogger = StubLogger()
-        result = simple_variable_checks(self.data, self.monthly_constraints,
+        result = simple_variable_checks(self.data, monthly_test_constraints,
                                         logger=alogger)
 
         assert result == (0, 1)
@@ -441,47 +919,40 @@ class TestMonthlyProductValidator(unittest.TestCase):
 
 
 class TestDailyProductValidator(unittest.TestCase):
-    def setUp(self):
-        self.time_vals = numpy.array([
-            684., 708., 732., 756., 780., 804., 828., 852.])
-        self.freq = 'day'
+    @classmethod
+    def setUpClass(cls):
+        cls.datapath = os.path.join(TEMPDIR, cls.__name__ + ".nc")
+
+        cls.time_vals = _TIME_VALS_DAY
+        cls.freq = 'day'
 
-        # Replace the 6-hourly field with daily settings.
-        self.day_constraints = copy.deepcopy(test_constraints)
-        self.day_constraints['testfield']['frequency'] = 'day'
-        self.day_constraints['testfield']['required_intervals']['time'] = \
-            24
+        create_example_files(cls.datapath, time_vals=cls.time_vals,
+                             freq=cls.freq)
+        cls.data = load_input(cls.datapath)
+        cls.time_arr = cls.data['time'][:]
 
-        create_example_files(time_vals=self.time_vals, freq=self.freq,
-                             constraints=self.day_constraints)
+    @classmethod
+    def tearDownClass(cls):
+        cls.data.close()
+        remove_file(cls.datapath)
 
-        self.data = load_input(datapath)
+    def setUp(self):
         self.day_step = 1
         self.by_day = 'days'
 
-    def tearDown(self):
-        """
-        Cleanup temporary files.
-        """
-        try:
-            os.remove(datapath)
-        except OSError:
-            pass
-        return
-
     def test_load_constraints_ok(self):
         """
         Check constraints load ok for daily meta-data.
         """
-        cons = load_constraints(jsonpath)
-        assert cons == self.day_constraints
+        cons = load_constraints(day_jsonpath)
+        assert cons == day_test_constraints
 
     def test_check_stepsize_ok(self):
         """
         Test correct daily stepsize matching.
         """
         assert check_stepsize(
-            self.data['time'][:], self.day_step,
+            self.time_arr, self.day_step,
             self.data.forecast_reference_time, self.by_day)
 
     def test_check_stepsize_fail(self):
@@ -490,7 +961,7 @@ class TestDailyProductValidator(unittest.TestCase):
         """
         step = self.day_step + 1
         assert not check_stepsize(
-            self.data['time'][:], step, self.data.forecast_reference_time,
+            self.time_arr, step, self.data.forecast_reference_time,
             self.by_day)
 
     def test_check_stepsize_irregular_stepsize_fails(self):
@@ -509,7 +980,7 @@ class TestDailyProductValidator(unittest.TestCase):
         because the constraint does not define time tests.
         """
         alogger = StubLogger()
-        result = simple_variable_checks(self.data, self.day_constraints,
+        result = simple_variable_checks(self.data, day_test_constraints,
                                         logger=alogger)
 
         assert result == (0, 1)
@@ -519,46 +990,40 @@ class TestDailyProductValidator(unittest.TestCase):
 
 
 class TestYearlyProductValidator(unittest.TestCase):
-    def setUp(self):
-        self.time_vals = numpy.array([4380., 13140.])
-        self.freq = 'years'
+    @classmethod
+    def setUpClass(cls):
+        cls.datapath = os.path.join(TEMPDIR, cls.__name__ + ".nc")
 
-        # Replace the 6-hourly field with yearly settings.
-        self.yearly_constraints = copy.deepcopy(test_constraints)
-        self.yearly_constraints['testfield']['frequency'] = 'years'
-        self.yearly_constraints['testfield']['required_intervals']['time'] = \
-            'years'
+        cls.time_vals = _TIME_VALS_YEARLY
+        cls.freq = 'years'
 
-        create_example_files(time_vals=self.time_vals, freq=self.freq,
-                             constraints=self.yearly_constraints)
+        create_example_files(cls.datapath, time_vals=cls.time_vals,
+                             freq=cls.freq)
+        cls.data = load_input(cls.datapath)
+        cls.time_arr = cls.data['time'][:]
 
-        self.data = load_input(datapath)
+    @classmethod
+    def tearDownClass(cls):
+        cls.data.close()
+        remove_file(cls.datapath)
+
+    def setUp(self):
         self.yearly_step = 1
         self.by_year = 'years'
 
-    def tearDown(self):
-        """
-        Cleanup temporary files
-        """
-        try:
-            os.remove(datapath)
-        except OSError:
-            pass
-        return
-
     def test_load_constraints_ok(self):
         """
         Check constraints load ok for monthly meta-data.
         """
-        cons = load_constraints(jsonpath)
-        assert cons == self.yearly_constraints
+        cons = load_constraints(yearly_jsonpath)
+        assert cons == yearly_test_constraints
 
     def test_check_stepsize_ok(self):
         """
         Test check correct monthly stepsize matching.
         """
         assert check_stepsize(
-            self.data['time'][:], self.yearly_step,
+            self.time_arr, self.yearly_step,
             self.data.forecast_reference_time, self.by_year)
 
     def test_check_stepsize_fail(self):
@@ -568,7 +1033,7 @@ class TestYearlyProductValidator(unittest.TestCase):
         step = self.yearly_step + 1
 
         assert not check_stepsize(
-            self.data['time'][:], step,
+            self.time_arr, step,
             self.data.forecast_reference_time, self.by_year)
 
     def test_check_stepsize_irregular_stepsize_fail(self):
@@ -586,7 +1051,7 @@ class TestYearlyProductValidator(unittest.TestCase):
         because the constraint does not define time tests.
         """
         alogger = StubLogger()
-        result = simple_variable_checks(self.data, self.yearly_constraints,
+        result = simple_variable_checks(self.data, yearly_test_constraints,
                                         logger=alogger)
 
         assert result == (0, 1)
@@ -595,6 +1060,16 @@ class TestYearlyProductValidator(unittest.TestCase):
         assert alogger.warns == ['Unknown Variable time']
 
 
+# Expected get_period_stepsize results, shared by the tests below
+_EXPECTED_6HR_STEPS = numpy.array([6., 6., 6., 6., 6., 6., 6.])
+_EXPECTED_12HR_STEPS = numpy.array([12., 12., 12., 12., 12., 12., 12.])
+_EXPECTED_GAP_STEPS = numpy.array([6., 30., 6.])
+_EXPECTED_7_UNIT_STEPS = numpy.array([1., 1., 1., 1., 1., 1., 1.])
+_EXPECTED_6_UNIT_STEPS = numpy.array([1., 1., 1., 1., 1., 1.])
+_EXPECTED_5_UNIT_STEPS = numpy.array([1., 1., 1., 1., 1.])
+_EXPECTED_1_UNIT_STEP = numpy.array([1.])
+
+
 class TestGetPeriodStepsize(unittest.TestCase):
 
     def setUp(self):
@@ -611,11 +1086,10 @@ class TestGetPeriodStepsize(unittest.TestCase):
         ref_time = "2021-05-10T00:00:00Z"
         leadtimes = numpy.array(
             [504., 510., 516., 522., 528., 534., 540., 546.])
-        expected_stepsizes = numpy.array([6., 6., 6., 6., 6., 6., 6.])
 
         stepsizes = get_period_stepsize(
             leadtimes, ref_time, self.period_hours)
-        self.assertTrue(numpy.array_equal(expected_stepsizes, stepsizes))
+        numpy.testing.assert_array_equal(stepsizes, _EXPECTED_6HR_STEPS)
 
     def test_get_expected_stepsize__12hr(self):
         """
@@ -625,11 +1099,22 @@ class TestGetPeriodStepsize(unittest.TestCase):
         ref_time = "2021-05-10T00:00:00Z"
         leadtimes = numpy.array(
             [504., 516., 528., 540., 552., 564., 576., 588.])
-        expected_stepsizes = numpy.array([12., 12., 12., 12., 12., 12., 12.])
 
         stepsizes = get_period_stepsize(
             leadtimes, ref_time, self.period_hours)
-        self.assertTrue(numpy.array_equal(expected_stepsizes, stepsizes))
+        numpy.testing.assert_array_equal(stepsizes, _EXPECTED_12HR_STEPS)
+
+    def test_get_expected_hourly_stepsize__gap(self):
+        """
+        Check that the step size array holds the total number of hours
+        between steps, including steps longer than a day.
+        """
+        ref_time = "2021-05-10T00:00:00Z"
+        leadtimes = numpy.array([504., 510., 540., 546.])
+
+        stepsizes = get_period_stepsize(
+            leadtimes, ref_time, self.period_hours)
+        numpy.testing.assert_array_equal(stepsizes, _EXPECTED_GAP_STEPS)
 
     def test_get_expected_stepsize__1day(self):
         """
@@ -639,11 +1124,10 @@ class TestGetPeriodStepsize(unittest.TestCase):
         ref_time = "2021-05-10T00:00:00Z"
         leadtimes = numpy.array(
             [468., 492., 516., 540., 564., 588., 612., 636.])
-        expected_stepsizes = numpy.array([1., 1., 1., 1., 1., 1., 1.])
 
         stepsizes = get_period_stepsize(
             leadtimes, ref_time, self.period_day)
-        self.assertTrue(numpy.array_equal(expected_stepsizes, stepsizes))
+        numpy.testing.assert_array_equal(stepsizes, _EXPECTED_7_UNIT_STEPS)
 
     def test_get_expected_monthly_stepsize__month_start(self):
         """
@@ -653,11 +1137,10 @@ class TestGetPeriodStepsize(unittest.TestCase):
         ref_time = '1995-04-01T00:00:00Z'
         leadtimes = numpy.array(
             [360., 1092., 1824., 2556., 3300., 4032., 4764.])
-        expected_stepsizes = numpy.array([1., 1., 1., 1., 1., 1.])
 
         stepsizes = get_period_stepsize(leadtimes, ref_time, self.period_month)
 
-        self.assertTrue(numpy.array_equal(expected_stepsizes, stepsizes))
+        numpy.testing.assert_array_equal(stepsizes, _EXPECTED_6_UNIT_STEPS)
 
     def test_get_expected_monthly_stepsize__mid_month(self):
         """
@@ -667,11 +1150,10 @@ class TestGetPeriodStepsize(unittest.TestCase):
         """
         ref_time = '1994-04-09T00:00:00Z'
         leadtimes = numpy.array([900., 1632., 2364., 3108., 3840., 4572.])
-        expected_stepsizes = numpy.array([1., 1., 1., 1., 1.])
 
         stepsizes = get_period_stepsize(leadtimes, ref_time, self.period_month)
 
-        self.assertTrue(numpy.array_equal(expected_stepsizes, stepsizes))
+        numpy.testing.assert_array_equal(stepsizes, _EXPECTED_5_UNIT_STEPS)
 
     def test_get_expected_monthly_stepsize__edge(self):
         """
@@ -681,11 +1163,10 @@ class TestGetPeriodStepsize(unittest.TestCase):
         """
         ref_time = '2020-11-01T00:00:00Z'
         leadtimes = numpy.array([360., 1092., 1836., 2544., 3252., 3984.])
-        expected_stepsizes = numpy.array([1., 1., 1., 1., 1.])
 
         stepsizes = get_period_stepsize(leadtimes, ref_time, self.period_month)
 
-        self.assertTrue(numpy.array_equal(expected_stepsizes, stepsizes))
+        numpy.testing.assert_array_equal(stepsizes, _EXPECTED_5_UNIT_STEPS)
 
     def test_get_expected_yearly_stepsize__non_leap(self):
         """
@@ -695,11 +1176,10 @@ class TestGetPeriodStepsize(unittest.TestCase):
         """
         ref_time = '2017-01-01T00:00:00Z'
         leadtimes = [8760., 17520.]
-        expected_stepsizes = numpy.array([1.])
 
         stepsizes = get_period_stepsize(leadtimes, ref_time, self.period_year)
 
-        self.assertTrue(numpy.array_equal(expected_stepsizes, stepsizes))
+        numpy.testing.assert_array_equal(stepsizes, _EXPECTED_1_UNIT_STEP)
 
     def test_get_expected_yearly_stepsize__leap(self):
         """
@@ -709,11 +1189,14 @@ class TestGetPeriodStepsize(unittest.TestCase):
         """
         ref_time = '2020-01-01T00:00:00Z'
         leadtimes = [8784., 17544.]
-        expected_stepsizes = numpy.array([1.])
 
         stepsizes = get_period_stepsize(leadtimes, ref_time, self.period_year)
 
-        self.assertTrue(numpy.array_equal(expected_stepsizes, stepsizes))
+        numpy.testing.assert_array_equal(stepsizes, _EXPECTED_1_UNIT_STEP)
+
+
+def tearDownModule():
+    shutil.rmtree(TEMPDIR, ignore_errors=True)
 
 
 if __name__ == '__main__':